@@ -5,10 +5,9 @@ More fit individuals have alternating bits. You get 1 point everytime your bit
 string has a 1 following a 0 or a 0 following a 1.
 """
 
-import random
 from gaexperiment import GAExperiment
 from math import ceil
-from utils import right_pad
+from utils import popcount, right_pad
 
 
 class Experiment(GAExperiment):
@@ -17,23 +16,24 @@ class Experiment(GAExperiment):
                  max_generations=100,
                  target_fitness=None,
                  num_digits=51):
+        # Checked here as well as in GAExperiment, the mask below needs it
+        if num_digits < 1:
+            raise ValueError('num_digits must be at least 1')
         self.num_digits = num_digits
+        # Fixed for the whole run, work it out once rather than every call
+        self._transitions_mask = (1 << (num_digits - 1)) - 1
         GAExperiment.__init__(self,
                               max_generations=max_generations,
                               population_size=population_size,
-                              target_fitness=target_fitness)
+                              target_fitness=target_fitness,
+                              num_bits=num_digits)
 
 
     def fitness(self, individual):
-        score = 0
-        for ix in range(1, len(individual)):
-            if individual[ix] != individual[ix - 1]:
-                score = score + 1
-        return score
-
-
-    def make_individual(self):
-        return ''.join(random.choice('01') for _ in range(self.num_digits))
+        # Bit ix of the xor is set when digits ix and ix + 1 differ; the top
+        # bit compares the last digit against nothing so mask it off
+        mask = self._transitions_mask
+        return popcount((individual ^ (individual >> 1)) & mask)
 
 
     def hook_post_generation(self):
@@ -42,7 +42,7 @@ class Experiment(GAExperiment):
         if gen % gen_check == 0 or gen == self.max_generations:
             ix = ceil(len(self.population) / 2)
             bits, ptile_score = self.population[ix]
-            agg_score = sum([_[1] for _ in self.population])
+            agg_score = sum(score for _, score in self.population)
             mean_score = agg_score / len(self.population)
             print('{}{}{}'.format(right_pad(gen),
                                   right_pad(mean_score),
@@ -65,5 +65,5 @@ if __name__ == '__main__':
                           right_pad('Mean Score'),
                           right_pad('Median Score')))
     exp.run()
-    print('\nMost fit {}'.format(exp.most_fit))
+    print('\nMost fit {}'.format(exp.format_bits(exp.most_fit)))
     print()
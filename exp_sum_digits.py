@@ -5,10 +5,9 @@ More fit inviduals have more 1s in their bit string. You get 1 point for every 1
 in your bit string. UNLESS! Your string is all 0s, then you get extra points :).
 """
 
-import random
 from gaexperiment import GAExperiment
 from math import ceil
-from utils import right_pad
+from utils import popcount, right_pad
 
 
 class Experiment(GAExperiment):
@@ -18,19 +17,17 @@ class Experiment(GAExperiment):
                  target_fitness=None,
                  num_digits=51):
         self.num_digits = num_digits
+        # The all 0s bonus, beats even a string of all 1s
+        self._all_zeros_score = num_digits + 1
         GAExperiment.__init__(self,
                               max_generations=max_generations,
                               population_size=population_size,
-                              target_fitness=target_fitness)
+                              target_fitness=target_fitness,
+                              num_bits=num_digits)
 
 
     def fitness(self, individual):
-        score = individual.count('1')
-        return self.num_digits + 1 if score == 0 else score
-
-
-    def make_individual(self):
-        return ''.join(random.choice('01') for _ in range(self.num_digits))
+        return popcount(individual) or self._all_zeros_score
 
 
     def hook_post_generation(self):
@@ -39,7 +36,7 @@ class Experiment(GAExperiment):
         if gen % gen_check == 0 or gen == self.max_generations:
             ix = ceil(len(self.population) / 2)
             bits, ptile_score = self.population[ix]
-            agg_score = sum([_[1] for _ in self.population])
+            agg_score = sum(score for _, score in self.population)
             mean_score = agg_score / len(self.population)
             print('{}{}{}'.format(right_pad(gen),
                                   right_pad(mean_score),
@@ -63,5 +60,5 @@ if __name__ == '__main__':
                           right_pad('Mean Score'),
                           right_pad('Median Score')))
     exp.run()
-    print('\nMost fit {}'.format(exp.most_fit))
+    print('\nMost fit {}'.format(exp.format_bits(exp.most_fit)))
     print()
@@ -1,22 +1,31 @@
 """
 A base class for GA experiments.
 
-Inherit from GAExperiment, define methods make_individual and fitness, then
-execute the experiment's run method.
+Inherit from GAExperiment, define a fitness method (and optionally
+make_individual), then execute the experiment's run method.
+
+Chromosomes are bit strings stored as python ints, bit 0 being the first digit
+in the string. Use format_bits to print one.
 """
 
 from abc import ABCMeta, abstractmethod
 from math import ceil, floor, inf
 from itertools import chain
-from collections import namedtuple
+from operator import itemgetter
+from concurrent.futures import ProcessPoolExecutor
+from copy import copy
+import os
 import random
+from utils import random_bits
 
 
 class GAExperiment(metaclass=ABCMeta):
     def __init__(self,
                  population_size=1000,
                  max_generations=100,
-                 target_fitness=None):
+                 target_fitness=None,
+                 num_bits=51,
+                 workers=1):
         """Initialize the experiment
 
         Create a generation 0 or random individuals and initialize other
@@ -34,45 +43,65 @@ class GAExperiment(metaclass=ABCMeta):
         - max_generations: Stop the experiment after this many generations
         - target_fitness: If not None, stop the experiment after we find an
           individual with at least this fitness score.
+        - num_bits: The length of each individual's chromosome bit string.
+        - workers: How many processes to score each generation with. 1 scores
+          in this process, None uses one per CPU. Only worth it for expensive
+          fitness functions, the experiment (sans population) must pickle.
         """
         if population_size < 1:
             raise ValueError('population_size must be at least 1')
+        if num_bits < 1:
+            raise ValueError('num_bits must be at least 1')
+        if workers is not None and (not isinstance(workers, int)
+                                    or workers < 1):
+            raise ValueError('workers must be None or an int of at least 1')
         self.population_size = population_size
         self.max_generations = max_generations
         self.target_fitness = target_fitness
+        self.num_bits = num_bits
+        self.workers = workers
+        self._pool = None
         pop = [self.make_individual() for _ in range(self.population_size)]
-        self.population = [(_, self.fitness(_)) for _ in pop]
-        self.population.sort(key=lambda x: x[1], reverse=True)
+        self.population = list(zip(pop, self.evaluate(pop)))
+        self.population.sort(key=itemgetter(1), reverse=True)
         self.generation = 0
-        self.mutate_probability = 1 / len(self.population[0][0])
+        self.mutate_probability = 1 / self.num_bits
         self.most_fit = None
         self.most_fit_score = -inf
 
 
     def run(self):
         """Run the experiment"""
-        while self.generation < self.max_generations:
-            self.hook_pre_generation()
-            # Determine which individuals will pass on genetic info to the next
-            # generation
-            pool = self.sample_population()
-            # Match up parents from the mating pool
-            num_parents_needed = ceil(self.population_size / 2)
-            parents = self.match_parents(pool, num_parents_needed)
-            # Breed to generate the next generation
-            children = self.breed(parents)
-            # Sort by fitness (descending)
-            children.sort(key=lambda x: x[1], reverse=True)
-            self.population = children
-            self.generation = self.generation + 1
-            bits, score = self.population[0]
-            if score > self.most_fit_score:
-                self.most_fit = bits
-                self.most_fit_score = score
-            self.hook_post_generation()
-            if self.target_fitness is not None:
-                if self.population[0][1] >= self.target_fitness:
-                    break
+        # Keep a single pool of workers alive for the whole run
+        if self.workers != 1:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            while self.generation < self.max_generations:
+                self.hook_pre_generation()
+                # Determine which individuals will pass on genetic info to the
+                # next generation
+                pool = self.sample_population()
+                # Match up parents from the mating pool
+                num_parents_needed = ceil(self.population_size / 2)
+                parents = self.match_parents(pool, num_parents_needed)
+                # Breed to generate the next generation
+                children = self.breed(parents)
+                # Sort by fitness (descending)
+                children.sort(key=itemgetter(1), reverse=True)
+                self.population = children
+                self.generation = self.generation + 1
+                bits, score = self.population[0]
+                if score > self.most_fit_score:
+                    self.most_fit = bits
+                    self.most_fit_score = score
+                self.hook_post_generation()
+                if self.target_fitness is not None:
+                    if self.population[0][1] >= self.target_fitness:
+                        break
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
 
 
     @abstractmethod
@@ -92,17 +121,53 @@ class GAExperiment(metaclass=ABCMeta):
         pass
 
 
-    @abstractmethod
-    def make_individual():
-        """Any random chromosome representation will do.
+    def evaluate(self, individuals):
+        """Get fitness scores for a batch of individuals (chromosomes).
 
-        This method is intended to be overwritten. It will be used to create
-        individuals whenever new ones are needed.
+        Every new individual of a generation is scored through this method in
+        a single call. By default it just maps fitness over the batch, override
+        it if you can score a whole population more cheaply than one
+        individual at a time.
+
+        Params:
+        - self: The experiment
+        - individuals: A list of chromosomes
 
         Returns:
-        A chromosome epresentation of an individual.
+        A list of fitness scores, in the same order as individuals.
         """
-        pass
+        if self._pool is None:
+            return list(map(self.fitness, individuals))
+        # Send the experiment as it stands this generation, so fitness sees
+        # whatever the hooks changed, minus what it doesn't need
+        worker_exp = copy(self)
+        worker_exp._pool = None
+        worker_exp.population = None
+        num_workers = self.workers or os.cpu_count() or 1
+        chunksize = max(1, len(individuals) // (4 * num_workers))
+        return list(self._pool.map(worker_exp.fitness, individuals,
+                                   chunksize=chunksize))
+
+
+    def make_individual(self):
+        """Make a random individual.
+
+        It will be used to create individuals whenever new ones are needed. By
+        default every bit is equally likely to be a 0 or a 1, override this
+        method to seed the population some other way.
+
+        Returns:
+        A chromosome representation of an individual.
+        """
+        return random.getrandbits(self.num_bits)
+
+
+    def format_bits(self, bits):
+        """Render a chromosome as a string of 1s and 0s
+
+        Digits are printed in chromosome order, i.e. bit 0 first.
+        """
+        return format(bits, '0{}b'.format(self.num_bits))[::-1]
 
 
     def sample_population(self):
@@ -114,13 +179,15 @@ class GAExperiment(metaclass=ABCMeta):
         """
         pop = self.population
         n = len(pop)
-        r = [random.random() for _ in range(n)]
-        return [pop[ix] for ix in range(n) if (n - ix)/n > r[ix]]
+        r = random.random
+        return [ind for ix, ind in enumerate(pop) if n - ix > n * r()]
 
 
     def match_parents(self, pool, num_needed):
         """Return a list of parents for mating
 
+        Parents are drawn from the pool at random, with replacement.
+
         Params:
         - self: The experiment
         - pool: Individuals, i.e. potential parents
@@ -129,19 +196,16 @@ class GAExperiment(metaclass=ABCMeta):
         Returns:
         A list of paired individual
         """
-        l = pool[:]
-        random.shuffle(l)
-        while len(l) < 2 * num_needed:
-            _l = pool[:]
-            random.shuffle(_l)
-            l = l + _l
-        return [(l[2 * ix], l[2 * ix + 1]) for ix in range(num_needed)]
+        l = random.choices(pool, k=2 * num_needed)
+        return list(zip(l[0::2], l[1::2]))
 
 
     def breed(self, parents):
         """Produce new individuals based on the given list of parents.
 
-        Each set of parents should yield two offspring.
+        Each set of parents should yield two offspring. Offspring identical to
+        one of their parents (carried over, no bits flipped, etc.) keep that
+        parent's score, the rest of the new generation is scored in one batch.
         """
         num_noop = floor(0.1 * len(parents))
         num_mutations = floor(0.6 * len(parents))
@@ -152,8 +216,16 @@ class GAExperiment(metaclass=ABCMeta):
         ix = ix + num_mutations
         xovers = [self.crossover(a, b) for a, b in parents[ix:ix+num_xover]]
         children = list(chain.from_iterable(noops))
-        children = children + list(chain.from_iterable(mutations))
-        children = children + list(chain.from_iterable(xovers))
+        kids = []
+        for (a, b), pair in zip(parents[num_noop:], chain(mutations, xovers)):
+            for kid in pair:
+                if kid == a[0]:
+                    children.append((kid, a[1]))
+                elif kid == b[0]:
+                    children.append((kid, b[1]))
+                else:
+                    kids.append(kid)
+        children = children + list(zip(kids, self.evaluate(kids)))
         return children
 
 
@@ -166,7 +238,7 @@ class GAExperiment(metaclass=ABCMeta):
         - b: Another individual
 
         Returns:
-        A mirrored pair of crossed-over individuals
+        A mirrored pair of crossed-over chromosomes
         """
         return self.crossover_uniform(a, b,)
 
@@ -182,16 +254,16 @@ class GAExperiment(metaclass=ABCMeta):
         - b: Another individual
 
         Returns:
-        A mirrored pair of crossed-over individuals
+        A mirrored pair of crossed-over chromosomes
         """
         bits_1, _ = a
         bits_2, _ = b
-        ix = random.randint(0, len(bits_1) - 1)
-        new_bits_1 = bits_1[:ix] + bits_2[ix:]
-        new_bits_2 = bits_2[:ix] + bits_1[ix:]
-        child_1 = new_bits_1, self.fitness(new_bits)
-        child_2 = new_bits_2, self.fitness(new_bits)
-        return child_1, child_2
+        ix = random.randint(0, self.num_bits - 1)
+        # Swap the digits before ix where the parents differ
+        swap = (bits_1 ^ bits_2) & ((1 << ix) - 1)
+        new_bits_1 = bits_2 ^ swap
+        new_bits_2 = bits_1 ^ swap
+        return new_bits_1, new_bits_2
 
 
     def crossover_uniform(self, a, b):
@@ -205,17 +277,15 @@ class GAExperiment(metaclass=ABCMeta):
         - b: Another individual
 
         Returns:
-        A mirrored pair of crossed-over individual
+        A mirrored pair of crossed-over chromosomes
         """
         bits_1, _ = a
         bits_2, _ = b
-        num_bits = len(bits_1)
-        randos = [random.random() for _ in range(num_bits)]
-        new_bits_1 = ''.join([bits_1[ix] if randos[ix] > 0.5 else bits_2[ix] for ix in range(num_bits)])
-        new_bits_2 = ''.join([bits_2[ix] if randos[ix] >= 0.5 else bits_1[ix] for ix in range(num_bits)])
-        child_1 = new_bits_1, self.fitness(new_bits_1)
-        child_2 = new_bits_2, self.fitness(new_bits_2)
-        return child_1, child_2
+        # Bits where the parents differ and the mask is set get swapped
+        swap = (bits_1 ^ bits_2) & random.getrandbits(self.num_bits)
+        new_bits_1 = bits_2 ^ swap
+        new_bits_2 = bits_1 ^ swap
+        return new_bits_1, new_bits_2
 
 
     def mutate(self, a, b,):
@@ -231,7 +301,7 @@ class GAExperiment(metaclass=ABCMeta):
         - b: Another individual
 
         Returns:
-        A pair of mutated individuals
+        A pair of mutated chromosomes
         """
         return self.mutate_one(a), self.mutate_one(b)
 
@@ -246,16 +316,10 @@ class GAExperiment(metaclass=ABCMeta):
         - individual: A bits/fitness score pair
 
         Returns:
-        An individual
+        A mutated chromosome
         """
         bits, _ = individual
-        n = len(bits)
-        p = self.mutate_probability
-        randos = [random.random() for _ in range(n)]
-        flip = {'0': '1', '1': '0'}
-        new_bit = lambda ix: bits[ix] if randos[ix] > p else flip[bits[ix]]
-        bits = ''.join([new_bit(ix) for ix in range(n)])
-        return bits, self.fitness(bits)
+        return bits ^ random_bits(self.num_bits, self.mutate_probability)
 
 
     def hook_pre_generation(self):
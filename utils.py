@@ -2,12 +2,43 @@
 Utility methods
 """
 
+from math import floor, log1p
+import random
+
+
 def right_pad(message, pad_to=20, pad_with=' '):
     """Pad a string with chars on the right until it reaches a certain width
 
-    Useful for aligning columns in console outputs.
+    Useful for aligning columns in console outputs. pad_with should be a
+    single character.
+    """
+    return str(message).ljust(pad_to, pad_with)
+
+
+def _popcount(bits):
+    """Count the set bits of a non-negative int"""
+    return bin(bits).count('1')
+
+
+# int.bit_count does the same thing in a single call on python 3.10+
+popcount = getattr(int, 'bit_count', _popcount)
+
+
+def random_bits(num_bits, p):
+    """Get an int whose low num_bits bits are each set with probability p
+
+    Rather than rolling the dice once per bit we jump from one set bit to the
+    next by sampling the (geometric) gap between them. That costs about
+    num_bits * p random draws instead of num_bits.
     """
-    message = str(message)
-    while len(message) < pad_to:
-        message = message + pad_with
-    return message
+    if p >= 1:
+        return (1 << num_bits) - 1
+    if p <= 0:
+        return 0
+    log_q = log1p(-p)
+    bits = 0
+    ix = floor(log1p(-random.random()) / log_q)
+    while ix < num_bits:
+        bits = bits | (1 << ix)
+        ix = ix + 1 + floor(log1p(-random.random()) / log_q)
+    return bits